@@ -1,29 +1,24 @@
 import tkinter as tk
 from tkinter.constants import *
-from dataclasses import dataclass, field
-from typing import MutableSet, FrozenSet
+from typing import List, NamedTuple, Tuple
+from collections import deque
 import random
+import statistics
 import time
-import threading
 
-CELL_DEFAULT_COLOUR = "white"
-ANIMATE_DELAY = 0.01
+FRAME_DELAY_MS = 16
+MAX_CELLS_PER_FRAME = 64
 
 
-@dataclass
-@dataclass(unsafe_hash=True)
-class Cell:
+class Cell(NamedTuple):
     x0: int
     y0: int
     x1: int
     y1: int
-    colour: str = field(default=CELL_DEFAULT_COLOUR, compare=False)
 
 
-def colour_cell(cell: Cell, canvas: tk.Canvas, colour: str):
-    canvas.create_rectangle(
-        cell.x0, cell.y0, cell.x1, cell.y1, fill=colour, outline="black"
-    )
+def colour_cell(cell: Cell, image: tk.PhotoImage, colour: str) -> None:
+    image.put(colour, to=cell)
 
 
 class WaveFunctionApp:
@@ -32,59 +27,67 @@ class WaveFunctionApp:
         self.height = height
         self.width = width
         self.step_count = step_count
+        self.step_size = width // step_count
 
         self.canvas = tk.Canvas(root, width=self.width, height=self.height)
         self.canvas.pack()
-        self._cells = None
-        self._drawn = set()
-        self.animate_stop = threading.Event()
-        self.animate_running = threading.Event()
+        self._img = tk.PhotoImage(width=self.width, height=self.height)
+        self._cells = tuple(self._get_cells())
+        # One byte per cell, indexed like self.cells; non-zero means drawn.
+        self._drawn = bytearray(len(self.cells))
+        # The geometry is fixed, so build the grid coordinates once.
+        self._grid_line = self._get_grid_line()
+        self.canvas.create_image((0, 0), image=self._img, anchor=NW)
+        self._rng = random.Random()
+        self.animate_running = False
+        self._animate_index = 0
+        self._animate_job = None
+        self._cells_per_frame = 1
+        self._frame_times = deque(maxlen=60)
+        self._dirty = False
 
     def go(self):
         self._draw_grid()
         self._draw_buttons()
 
-    @property
-    def step_size(self) -> int:
-        return int(self.width / self.step_count)
+    def _mark_dirty(self) -> None:
+        # Schedule one flush when the canvas first becomes dirty; later paints
+        # before that flush ride along with it.
+        if not self._dirty:
+            self._dirty = True
+            self.root.after(FRAME_DELAY_MS, self._flush)
+
+    def _flush(self) -> None:
+        self._dirty = False
+        self.canvas.update_idletasks()
 
     @property
-    def cells(self) -> FrozenSet[Cell]:
-        if self._cells is None:
-            self._cells = self._get_cells()
-        return set(self._cells)
+    def cells(self) -> Tuple[Cell, ...]:
+        return self._cells
 
     @property
-    def drawn(self) -> MutableSet[Cell]:
+    def drawn(self) -> bytearray:
         return self._drawn
 
-    @drawn.setter
-    def drawn(self, drawn):
-        self._drawn = drawn
-
     def _draw_grid(self):
-        y_start = 0
-        y_end = self.height
+        self.canvas.create_line(self._grid_line)
 
+    def _get_grid_line(self) -> Tuple[int, ...]:
+        # One polyline for the whole grid: every connecting move runs along
+        # the x=0 or y=0 edge, which is itself a grid line.
+        points = []
         for x in range(0, self.width, self.step_size):
-            line = (x, y_start, x, y_end)
-            self.canvas.create_line(line)
-
-        x_start = 0
-        x_end = self.width
-
+            points += [x, 0, x, self.height, x, 0]
         for y in range(0, self.height, self.step_size):
-            line = (x_start, y, x_end, y)
-            self.canvas.create_line(line)
+            points += [0, y, self.width, y, 0, y]
+        return tuple(points)
 
-    def _get_cells(self) -> FrozenSet[Cell]:
-        cells = []
-        for x in range(0, self.width, self.step_size):
-            for y in range(0, self.height, self.step_size):
-                cells.append(
-                    Cell(x0=x, y0=y, x1=x + self.step_size, y1=y + self.step_size)
-                )
-        return cells
+    def _get_cells(self) -> List[Cell]:
+        # Column-major order, so the cell at (row, col) lives at col * rows + row.
+        step = self.step_size
+        xs = range(0, self.width, step)
+        ys = range(0, self.height, step)
+        return [Cell(x0=x, y0=y, x1=x + step, y1=y + step) for x in xs for y in ys]
 
     def _draw_buttons(self) -> None:
         button_frame = tk.Frame(self.root)
@@ -111,45 +114,71 @@ class WaveFunctionApp:
         animate.bind("<Button-1>", self.animate)
 
     def go_click(self, event: tk.Event) -> None:
-        next = random.choice(list(self.cells))
-        self.drawn.add(next)
-        colour_cell(next, self.canvas, "blue")
+        i = self._rng.randrange(len(self.cells))
+        self.drawn[i] = 1
+        colour_cell(self.cells[i], self._img, "blue")
+        self._mark_dirty()
 
     def fill_all(self, event: tk.Event) -> None:
-        for cell in self.cells:
-            cell.colour = "blue"
-            self.drawn.add(cell)
-            colour_cell(cell, self.canvas, cell.colour)
+        self._img.put("blue", to=(0, 0, self.width, self.height))
+        self.drawn[:] = b"\x01" * len(self.drawn)
+        self._mark_dirty()
 
     def reset(self, event: tk.Event) -> None:
-        self.animate_stop.set()
-        for cell in self.drawn:
-            cell.colour = CELL_DEFAULT_COLOUR
-            colour_cell(cell, self.canvas, cell.colour)
-        
-        time.sleep(0.5)
-        self.animate_stop.clear()
-        
-        self.drawn = set()
+        self._stop_animation()
+        self._img.blank()
+        self.drawn[:] = bytes(len(self.drawn))
+        self._mark_dirty()
+
+    def _stop_animation(self) -> None:
+        if self._animate_job is not None:
+            self.root.after_cancel(self._animate_job)
+            self._animate_job = None
+        self.animate_running = False
 
     def _animate(self) -> None:
-        for cell in self.cells:
-            if self.animate_stop.is_set():
-                break
-
-            if cell not in self.drawn:
-                cell.colour = "blue"
-                self.drawn.add(cell)
-                colour_cell(cell, self.canvas, cell.colour)
-                self.canvas.update()
-                time.sleep(ANIMATE_DELAY)
-        self.animate_running.clear()
+        start = time.perf_counter()
+        painted = 0
+        cells = self.cells
+        while painted < self._cells_per_frame:
+            # Skip already drawn cells with a C-level scan of the mask.
+            i = self.drawn.find(0, self._animate_index)
+            if i == -1:
+                self._mark_dirty()
+                self._animate_job = None
+                self.animate_running = False
+                return
+
+            self._animate_index = i + 1
+            self.drawn[i] = 1
+            colour_cell(cells[i], self._img, "blue")
+            painted += 1
+
+        # Flush the batch inside the timed region so the timing below
+        # includes the redraw, not just the puts.
+        self.canvas.update_idletasks()
+        # Adapt the batch size so each frame's work fits in the frame budget.
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > FRAME_DELAY_MS:
+            self._cells_per_frame = max(1, self._cells_per_frame // 2)
+        elif elapsed_ms < FRAME_DELAY_MS / 2:
+            self._cells_per_frame = min(
+                MAX_CELLS_PER_FRAME, self._cells_per_frame * 2
+            )
+
+        # Subtract the recent average frame cost from the delay, so the
+        # period between frame starts stays close to FRAME_DELAY_MS.
+        self._frame_times.append(elapsed_ms)
+        delay_ms = max(0, round(FRAME_DELAY_MS - statistics.mean(self._frame_times)))
+        self._animate_job = self.root.after(delay_ms, self._animate)
 
     def animate(self, event: tk.Event) -> None:
-        if not self.animate_running.is_set():
-            self.animate_running.set()
-            threading.Thread(target=self._animate).start()
-            
+        if not self.animate_running:
+            self.animate_running = True
+            self._animate_index = 0
+            self._cells_per_frame = 1
+            self._frame_times.clear()
+            self._animate()
 
 
 if __name__ == "__main__":